@@ -8,20 +8,164 @@ relative timing relationships and maintaining realistic commit patterns.
 """
 
 import argparse
+import json
+import os
+import shutil
 import subprocess
 import sys
-import re
-from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+import shlex
+import tempfile
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Tuple, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+# Marks the start of each commit header in batched `git log` output
+COMMIT_SENTINEL = '\x01'
+
+# Numstat cache, stored inside the repository's .git directory
+NUMSTAT_CACHE_FILE = 'adjuster-cache.json'
+
+# Reference point for integer day/time-of-day arithmetic on naive datetimes
+EPOCH = datetime(1970, 1, 1)
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday=0)
+SECONDS_PER_DAY = 86400
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Day type lookup, indexed by (days since EPOCH) % 7: 1 for Saturday/Sunday
+WEEKEND_BY_DAY = tuple(int((d + EPOCH_WEEKDAY) % 7 >= 5) for d in range(7))
+
+
+def _next_hobby_start(ts: int, start_s: int, end_s: int) -> int:
+    """
+    Get the next hobby window start from a local time.
+
+    Times are whole seconds since EPOCH; start_s/end_s are the window bounds
+    in seconds from midnight.
+    """
+    day, time_of_day = divmod(ts, SECONDS_PER_DAY)
+    midnight = day * SECONDS_PER_DAY
+    next_midnight = midnight + SECONDS_PER_DAY
+    next_day_is_weekend = WEEKEND_BY_DAY[(day + 1) % 7]
+
+    # If it's a weekend, start at midnight of the weekend day
+    if WEEKEND_BY_DAY[day % 7]:
+        return midnight
+
+    # Check if we can start today (weekday evening)
+    start_time = midnight + start_s
+
+    if start_s < end_s:
+        # Same day window; already past start time means the next day
+        if time_of_day >= start_s:
+            start_time = next_midnight if next_day_is_weekend else start_time + SECONDS_PER_DAY
+    elif time_of_day < start_s:
+        # Crosses midnight
+        if time_of_day < end_s:
+            # We're in the early morning part of the window from yesterday
+            # Go back to yesterday's start
+            start_time -= SECONDS_PER_DAY
+        elif next_day_is_weekend:
+            # Past the morning part and tomorrow is a weekend
+            start_time = next_midnight
+        # Otherwise wait until evening
+
+    return start_time
+
+
+def _window_end(start: int, start_s: int, end_s: int) -> int:
+    """Get the end of the hobby window starting at a local time (see above)."""
+    day = start // SECONDS_PER_DAY
+
+    # Weekend: end at midnight Monday (covers whole weekend), i.e. one day
+    # later from Sunday and two from Saturday
+    if WEEKEND_BY_DAY[day % 7]:
+        return (day + 1 + WEEKEND_BY_DAY[(day + 1) % 7]) * SECONDS_PER_DAY
+
+    # Weekday: same day, or next day if the window crosses midnight
+    if start_s < end_s:
+        return day * SECONDS_PER_DAY + end_s
+    return (day + 1) * SECONDS_PER_DAY + end_s
+
+
+def _in_hobby_window(ts: int, start_s: int, end_s: int) -> bool:
+    """Check if a local time (see above) is within hobby hours."""
+    day, time_of_day = divmod(ts, SECONDS_PER_DAY)
+
+    # Weekend: all day (00:00-24:00)
+    if WEEKEND_BY_DAY[day % 7]:
+        return True
+
+    # Weekday: use configured hours
+    if start_s < end_s:
+        # Same day window
+        return start_s <= time_of_day < end_s
+    # Crosses midnight
+    return time_of_day >= start_s or time_of_day < end_s
+
+
+def _walk_hobby_windows(first_ts: int, gaps_us, start_s: int, end_s: int, out_us):
+    """
+    Place commits one after another into hobby windows.
+
+    first_ts is the first commit's original local time in seconds since
+    EPOCH and gaps_us[i] the minimum gap before commit i, in microseconds.
+    Each commit's new local time (microseconds since EPOCH) goes to out_us[i].
+    """
+    us = 1000000
+    window_start = _next_hobby_start(first_ts, start_s, end_s)
+    window_end = _window_end(window_start, start_s, end_s) * us
+    current_time = window_start * us
+    out_us[0] = current_time
+
+    for i in range(1, len(gaps_us)):
+        # Add the gap to current time
+        next_time = current_time + gaps_us[i]
+
+        # Check if next_time fits in current window
+        if next_time >= window_end:
+            # Doesn't fit, move to next window
+            # Move past the current window end to find the next window
+            window_start = _next_hobby_start(window_end // us + 3600, start_s, end_s)
+            window_end = _window_end(window_start, start_s, end_s) * us
+            current_time = window_start * us
+        else:
+            current_time = next_time
+
+        out_us[i] = current_time
+
+
+def format_tz_offset(offset: int) -> str:
+    """Format a UTC offset in seconds the way git does (e.g. '+0200')."""
+    sign = '-' if offset < 0 else '+'
+    hours, minutes = divmod(abs(offset) // 60, 60)
+    return f"{sign}{hours:02d}{minutes:02d}"
+
+
+def coding_time_hours(total_lines_changed: int) -> float:
+    """Minimum time required based on coding rate (100 lines/hour)."""
+    if total_lines_changed == 0:
+        return 5.0 / 60.0  # 5 minutes for empty commits
+    return total_lines_changed / 100.0
+
+
+@dataclass(frozen=True)
 class Commit:
-    """Represents a git commit with relevant metadata."""
+    """
+    Represents a git commit with relevant metadata.
+
+    Dates are naive local times in the commit's own timezone; the author's
+    UTC offset is kept separately in tz_offset (e.g. '+0200').
+    """
+    # Declared by hand rather than dataclass(slots=True), which needs 3.10+
+    __slots__ = ('hash', 'author_date', 'committer_date', 'tz_offset',
+                 'lines_added', 'lines_deleted', 'message', 'parent_count')
+
     hash: str
     author_date: datetime
     committer_date: datetime
+    tz_offset: str
     lines_added: int
     lines_deleted: int
     message: str
@@ -34,9 +178,73 @@ class Commit:
     @property
     def min_time_hours(self) -> float:
         """Minimum time required based on coding rate (100 lines/hour)."""
-        if self.total_lines_changed == 0:
-            return 5.0 / 60.0  # 5 minutes for empty commits
-        return self.total_lines_changed / 100.0
+        return coding_time_hours(self.total_lines_changed)
+
+
+class CommitTable:
+    """
+    Commits stored column-wise, as parallel arrays.
+
+    Timestamps are Unix seconds with their UTC offsets (in seconds) kept
+    alongside, so the timestamp math never touches per-commit objects.
+    Indexing builds a Commit view on demand.
+    """
+
+    def __init__(self):
+        self.hashes: List[str] = []
+        self.messages: List[str] = []
+        self.author_ts = array('q')
+        self.author_tz = array('l')
+        self.committer_ts = array('q')
+        self.committer_tz = array('l')
+        self.lines_added = array('q')
+        self.lines_deleted = array('q')
+        self.parent_counts = array('l')
+
+    def append(
+        self,
+        commit_hash: str,
+        author_date: datetime,
+        committer_date: datetime,
+        lines_added: int,
+        lines_deleted: int,
+        message: str,
+        parent_count: int
+    ):
+        """Add a commit; dates must be timezone-aware."""
+        self.hashes.append(commit_hash)
+        self.messages.append(message)
+        self.author_ts.append(int(author_date.timestamp()))
+        self.author_tz.append(int(author_date.utcoffset().total_seconds()))
+        self.committer_ts.append(int(committer_date.timestamp()))
+        self.committer_tz.append(int(committer_date.utcoffset().total_seconds()))
+        self.lines_added.append(lines_added)
+        self.lines_deleted.append(lines_deleted)
+        self.parent_counts.append(parent_count)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __getitem__(self, index: int) -> Commit:
+        i = range(len(self.hashes))[index]  # Normalizes negative indexes
+        author_date = datetime.fromtimestamp(
+            self.author_ts[i], timezone(timedelta(seconds=self.author_tz[i])))
+        committer_date = datetime.fromtimestamp(
+            self.committer_ts[i], timezone(timedelta(seconds=self.committer_tz[i])))
+        return Commit(
+            hash=self.hashes[i],
+            author_date=author_date.replace(tzinfo=None),
+            committer_date=committer_date.replace(tzinfo=None),
+            tz_offset=format_tz_offset(self.author_tz[i]),
+            lines_added=self.lines_added[i],
+            lines_deleted=self.lines_deleted[i],
+            message=self.messages[i],
+            parent_count=self.parent_counts[i]
+        )
+
+    def __iter__(self) -> Iterator[Commit]:
+        for i in range(len(self.hashes)):
+            yield self[i]
 
 
 class GitTimestampAdjuster:
@@ -51,7 +259,8 @@ class GitTimestampAdjuster:
         distance_factor: float = 0.5,
         dry_run: bool = False,
         backup_branch: Optional[str] = None,
-        new_email: Optional[str] = None
+        new_email: Optional[str] = None,
+        verbose_validate: bool = False
     ):
         self.branch = branch
         self.start_hour = start_hour
@@ -61,6 +270,7 @@ class GitTimestampAdjuster:
         self.dry_run = dry_run
         self.backup_branch = backup_branch or f"backup-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
         self.new_email = new_email
+        self.verbose_validate = verbose_validate
 
         # Weekend hours (Saturday and Sunday): all day
         self.weekend_start_hour = 0
@@ -74,14 +284,24 @@ class GitTimestampAdjuster:
             # Same day (e.g., 08:00 to 17:00)
             self.window_hours = self.end_hour - self.start_hour
 
-    def run_git_command(self, cmd: List[str], check: bool = True) -> str:
+        # Window bounds in seconds from midnight, for integer time-of-day math
+        self._start_s = self.start_hour * 3600
+        self._end_s = self.end_hour * 3600
+
+    def run_git_command(
+        self,
+        cmd: List[str],
+        check: bool = True,
+        env: Optional[Dict[str, str]] = None
+    ) -> str:
         """Run a git command and return output."""
         try:
             result = subprocess.run(
                 cmd,
                 capture_output=True,
                 text=True,
-                check=check
+                check=check,
+                env=env
             )
             return result.stdout.strip()
         except subprocess.CalledProcessError as e:
@@ -89,80 +309,194 @@ class GitTimestampAdjuster:
             print(f"Error: {e.stderr}", file=sys.stderr)
             sys.exit(1)
 
+    def git_command_succeeds(self, cmd: List[str]) -> bool:
+        """Run a git command for its exit status only."""
+        return subprocess.run(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        ).returncode == 0
+
+    def run_git_stream(self, cmd: List[str], input: Optional[str] = None) -> subprocess.Popen:
+        """Start a git command whose stdout is read line by line."""
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        if input is not None:
+            # Only used with --stdin, where git reads all input before writing
+            proc.stdin.write(input)
+            proc.stdin.close()
+        return proc
+
+    def read_git_log(
+        self,
+        cmd: List[str],
+        input: Optional[str] = None
+    ) -> Iterator[Tuple[str, int, int]]:
+        """
+        Stream a git log whose format starts each commit with COMMIT_SENTINEL.
+
+        Yields tuples: (header, lines_added, lines_deleted), where the line
+        counts are summed from any --numstat output following the header.
+        """
+        proc = self.run_git_stream(cmd, input)
+
+        header = None
+        lines_added = 0
+        lines_deleted = 0
+        for line in proc.stdout:
+            line = line.rstrip('\n')
+            if line.startswith(COMMIT_SENTINEL):
+                if header is not None:
+                    yield header, lines_added, lines_deleted
+                header = line[len(COMMIT_SENTINEL):]
+                lines_added = 0
+                lines_deleted = 0
+                continue
+
+            # Numstat line: "<added>\t<deleted>\t<path>"; binary files
+            # report "-\t-\t<path>" and are skipped
+            parts = line.split('\t', 2)
+            if len(parts) == 3 and parts[0].isdigit():
+                lines_added += int(parts[0])
+                lines_deleted += int(parts[1])
+
+        if header is not None:
+            yield header, lines_added, lines_deleted
+
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            print(f"Error running git command: {' '.join(cmd)}", file=sys.stderr)
+            print(f"Error: {stderr}", file=sys.stderr)
+            sys.exit(1)
+
+    def load_numstat_cache(self, path: str) -> Dict[str, List[int]]:
+        """Load the hash -> [lines_added, lines_deleted] cache, if present."""
+        try:
+            with open(path) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        # Ignore a cache of any other shape rather than trusting it
+        if not isinstance(cache, dict) or not all(
+            isinstance(stats, list) and len(stats) == 2 and
+            all(type(n) is int for n in stats)
+            for stats in cache.values()
+        ):
+            return {}
+        return cache
+
+    def save_numstat_cache(self, path: str, cache: Dict[str, List[int]]):
+        """Write the numstat cache; failing to do so is not an error."""
+        try:
+            with open(path, 'w') as f:
+                json.dump(cache, f)
+        except OSError:
+            pass
+
     def check_repository_state(self):
         """Validate repository state before processing."""
         # Check if we're in a git repository
         self.run_git_command(['git', 'rev-parse', '--git-dir'])
 
-        # Check if branch exists
-        branches = self.run_git_command(['git', 'branch', '--list', self.branch])
-        if not branches:
+        # Check if branch exists (a direct ref lookup, no ref enumeration)
+        branch_sha = self.run_git_command(
+            ['git', 'rev-parse', '--verify', '--quiet', f'refs/heads/{self.branch}'],
+            check=False
+        )
+        if not branch_sha:
             print(f"ERROR: Branch '{self.branch}' does not exist.", file=sys.stderr)
             sys.exit(1)
 
-        # Check for uncommitted changes
-        status = self.run_git_command(['git', 'status', '--porcelain'])
-        if status:
-            print("WARNING: Repository has uncommitted changes.")
-            print("Uncommitted changes will not affect the history rewrite,")
-            print("but you may want to commit or stash them first.")
-            response = input("Continue anyway? [y/N]: ")
-            if response.lower() != 'y':
-                print("Aborted.")
-                sys.exit(0)
+        # Check for uncommitted changes: the history rewrite resets the
+        # working tree, so they would be lost
+        if self.has_uncommitted_changes():
+            if self.dry_run:
+                print("WARNING: Repository has uncommitted changes.")
+                print("Commit or stash them before running without --dry-run.")
+            else:
+                self.abort_uncommitted_changes()
+
+    def has_uncommitted_changes(self) -> bool:
+        """Check for uncommitted changes to tracked files."""
+        # Refresh stat info first so merely touched files don't count, as in
+        # git's own require_clean_work_tree. Unlike git status, this doesn't
+        # scan the worktree for untracked files
+        self.git_command_succeeds(['git', 'update-index', '-q', '--refresh'])
+        return not self.git_command_succeeds(['git', 'diff-index', '--quiet', 'HEAD', '--'])
+
+    def abort_uncommitted_changes(self):
+        """Exit because uncommitted changes would be lost by the rewrite."""
+        print("ERROR: Repository has uncommitted changes.", file=sys.stderr)
+        print("The history rewrite resets the working tree and would discard them.",
+              file=sys.stderr)
+        print("Commit or stash them first.", file=sys.stderr)
+        sys.exit(1)
 
-    def get_commits(self) -> List[Commit]:
+    def get_commits(self) -> CommitTable:
         """Retrieve all commits from the specified branch."""
-        # Get commit list with format: hash|author_date|committer_date|parent_count|subject
-        log_format = "%H|%aI|%cI|%P|%s"
-        log_output = self.run_git_command([
-            'git', 'log', self.branch,
-            f'--format={log_format}',
-            '--reverse'  # Start from oldest
-        ])
-
-        commits = []
-        for line in log_output.split('\n'):
-            if not line:
-                continue
-
-            parts = line.split('|', 4)
-            commit_hash = parts[0]
-            author_date = datetime.fromisoformat(parts[1].replace('Z', '+00:00'))
-            committer_date = datetime.fromisoformat(parts[2].replace('Z', '+00:00'))
-            parents = parts[3].split() if parts[3] else []
-            message = parts[4] if len(parts) > 4 else ""
-
-            # Get line statistics
-            stat_output = self.run_git_command([
-                'git', 'show', '--numstat', '--format=', commit_hash
+        # Line counts never change for a given hash, so they are cached across
+        # runs; only commits missing from the cache need a (costly) diff
+        git_dir = self.run_git_command(['git', 'rev-parse', '--git-dir'])
+        cache_path = os.path.join(git_dir, NUMSTAT_CACHE_FILE)
+        cache = self.load_numstat_cache(cache_path)
+
+        # Header fields are NUL-separated (hash, author_date, committer_date,
+        # parents, subject) since NUL can't appear in a subject
+        log_format = f"{COMMIT_SENTINEL}%H%x00%aI%x00%cI%x00%P%x00%s"
+        headers = [
+            header.split('\x00')
+            for header, _, _ in self.read_git_log([
+                'git', 'log', self.branch,
+                f'--format={log_format}',
+                '--reverse'  # Start from oldest
             ])
+        ]
+
+        # Single git log call for all uncached commits: each sentinel-prefixed
+        # hash is followed by its numstat lines
+        missing = [fields[0] for fields in headers if fields[0] not in cache]
+        if missing:
+            for commit_hash, lines_added, lines_deleted in self.read_git_log([
+                'git', 'log', '--no-walk=unsorted', '--stdin',
+                f'--format={COMMIT_SENTINEL}%H',
+                '--numstat',
+                '--root'  # Diff the root commit too, whatever log.showRoot says
+            ], input='\n'.join(missing) + '\n'):
+                cache[commit_hash] = [lines_added, lines_deleted]
+
+        commits = CommitTable()
+        for commit_hash, author_date, committer_date, parents, message in headers:
+            lines_added, lines_deleted = cache[commit_hash]
+            commits.append(
+                commit_hash,
+                datetime.fromisoformat(author_date.replace('Z', '+00:00')),
+                datetime.fromisoformat(committer_date.replace('Z', '+00:00')),
+                lines_added,
+                lines_deleted,
+                message,
+                len(parents.split())
+            )
 
-            lines_added = 0
-            lines_deleted = 0
-            for stat_line in stat_output.split('\n'):
-                if not stat_line:
-                    continue
-                match = re.match(r'(\d+)\s+(\d+)\s+', stat_line)
-                if match:
-                    lines_added += int(match.group(1))
-                    lines_deleted += int(match.group(2))
-
-            commits.append(Commit(
-                hash=commit_hash,
-                author_date=author_date,
-                committer_date=committer_date,
-                lines_added=lines_added,
-                lines_deleted=lines_deleted,
-                message=message,
-                parent_count=len(parents)
-            ))
+        # Drop entries no ref reaches any more (e.g. commits replaced by an
+        # earlier rewrite); other branches' entries are kept, so alternating
+        # runs on different branches don't evict each other's counts
+        if missing:
+            reachable = set(self.run_git_command(['git', 'rev-list', '--all']).split())
+            cache = {h: counts for h, counts in cache.items() if h in reachable}
+            self.save_numstat_cache(cache_path, cache)
 
         return commits
 
-    def check_for_merges(self, commits: List[Commit]):
+    def check_for_merges(self, commits: CommitTable):
         """Check for merge commits and exit if found."""
-        merge_commits = [c for c in commits if c.parent_count > 1]
+        merge_commits = [commits[i] for i, n in enumerate(commits.parent_counts) if n > 1]
 
         if merge_commits:
             print("\nERROR: Cannot process branch with merge commits.\n", file=sys.stderr)
@@ -180,204 +514,129 @@ class GitTimestampAdjuster:
 
     def is_weekend(self, dt: datetime) -> bool:
         """Check if a datetime falls on a weekend (Saturday=5, Sunday=6)."""
-        return dt.weekday() in (5, 6)
+        return dt.weekday() >= 5
+
+    def to_seconds(self, dt: datetime) -> int:
+        """Convert a naive (local) datetime to whole seconds since 1970-01-01."""
+        return (dt - EPOCH) // timedelta(seconds=1)
+
+    def from_seconds(self, ts: int) -> datetime:
+        """Convert seconds since 1970-01-01 back to a naive (local) datetime."""
+        return EPOCH + timedelta(seconds=ts)
+
+    def from_microseconds(self, us: int) -> datetime:
+        """Convert microseconds since 1970-01-01 to a naive (local) datetime."""
+        return EPOCH + us * ONE_MICROSECOND
 
     def is_in_hobby_window(self, dt: datetime) -> bool:
-        """Check if a datetime is within hobby hours."""
-        # Work with naive datetime (local time)
-        if dt.tzinfo is not None:
-            dt = dt.replace(tzinfo=None)
-
-        # Weekend: all day (00:00-24:00)
-        if self.is_weekend(dt):
-            return True
-
-        # Weekday: use configured hours
-        hour = dt.hour
-        if self.start_hour < self.end_hour:
-            # Same day window
-            return self.start_hour <= hour < self.end_hour
-        else:
-            # Crosses midnight
-            return hour >= self.start_hour or hour < self.end_hour
+        """Check if a (naive, local) datetime is within hobby hours."""
+        # Weekend: all day (00:00-24:00); weekday: within the configured
+        # window, measured from its start (modulo a day for midnight crossing)
+        return self.is_weekend(dt) or (dt.hour - self.start_hour) % 24 < self.window_hours
 
     def get_next_hobby_start(self, dt: datetime) -> datetime:
-        """Get the next hobby window start time from a given datetime."""
-        # Convert to naive local time for calculation
-        if dt.tzinfo is not None:
-            dt = dt.replace(tzinfo=None)
-
-        # If it's a weekend, start immediately (00:00 or current time if already in weekend)
-        if self.is_weekend(dt):
-            # Start at midnight of the weekend day
-            return dt.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # Check if we can start today (weekday evening)
-        start_time = dt.replace(hour=self.start_hour, minute=0, second=0, microsecond=0)
-
-        if self.start_hour < self.end_hour:
-            # Same day window
-            if dt.hour >= self.start_hour:
-                # Already past start time, check if next day is weekend
-                next_day = dt + timedelta(days=1)
-                if self.is_weekend(next_day):
-                    # Next day is weekend, start at midnight
-                    return next_day.replace(hour=0, minute=0, second=0, microsecond=0)
-                else:
-                    # Next day is weekday
-                    return start_time + timedelta(days=1)
-        else:
-            # Crosses midnight
-            if self.start_hour <= dt.hour < 24:
-                # Can start today
-                pass
-            elif dt.hour < self.end_hour:
-                # We're in the early morning part of the window from yesterday
-                # Go back to yesterday's start
-                start_time -= timedelta(days=1)
-            else:
-                # Past the morning part, check what's next
-                # Check if tomorrow is a weekend
-                next_day = dt + timedelta(days=1)
-                if self.is_weekend(next_day):
-                    return next_day.replace(hour=0, minute=0, second=0, microsecond=0)
-                # Otherwise wait until evening
-
-        return start_time
+        """Get the next hobby window start time from a given (naive, local) datetime."""
+        return self.from_seconds(_next_hobby_start(self.to_seconds(dt), self._start_s, self._end_s))
 
     def get_window_end(self, start: datetime) -> datetime:
-        """Get the end time of a hobby window given its start."""
-        # Work with naive datetime
-        if start.tzinfo is not None:
-            start = start.replace(tzinfo=None)
-
-        # Weekend: end at midnight Monday (covers whole weekend)
-        if self.is_weekend(start):
-            # If it's Saturday, end at midnight Monday (2 days)
-            # If it's Sunday, end at midnight Monday (1 day)
-            days_until_monday = 7 - start.weekday()  # weekday: Sat=5, Sun=6
-            if start.weekday() == 5:  # Saturday
-                days_until_monday = 2
-            else:  # Sunday
-                days_until_monday = 1
-            end = start + timedelta(days=days_until_monday)
-            return end.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # Weekday logic
-        if self.start_hour < self.end_hour:
-            # Same day
-            return start.replace(hour=self.end_hour, minute=0, second=0, microsecond=0)
-        else:
-            # Next day
-            end = start + timedelta(days=1)
-            return end.replace(hour=self.end_hour, minute=0, second=0, microsecond=0)
+        """Get the end time of a hobby window given its (naive, local) start."""
+        return self.from_seconds(_window_end(self.to_seconds(start), self._start_s, self._end_s))
 
-    def calculate_new_timestamps(self, commits: List[Commit]) -> List[Tuple[Commit, datetime, datetime]]:
+    def calculate_new_timestamps(self, commits: CommitTable) -> array:
         """
         Calculate new timestamps for all commits.
 
-        Returns list of tuples: (commit, new_author_date, new_committer_date)
+        Returns each commit's new local time, used for both its author and
+        committer date, in microseconds since 1970-01-01; indexed like commits.
+        All new times are in the first commit's timezone, so that their order
+        holds in absolute time too.
         """
         if not commits:
-            return []
-
-        adjusted = []
-
-        # Start from the first hobby window after the first commit
-        # Convert to naive datetime for calculations
-        first_commit_date = commits[0].author_date
-        if first_commit_date.tzinfo is not None:
-            first_commit_date = first_commit_date.replace(tzinfo=None)
-
-        current_time = self.get_next_hobby_start(first_commit_date)
-
-        # Track which window we're currently in
-        window_start = current_time
-        window_end = self.get_window_end(window_start)
-
-        for i, commit in enumerate(commits):
-            # Calculate minimum time from previous commit
-            if i > 0:
-                prev_commit = commits[i - 1]
-
-                # FR-3.1: Temporal distance preservation (50% minimum)
-                original_distance = (commit.author_date - prev_commit.author_date).total_seconds()
-                min_distance_seconds = original_distance * self.distance_factor
-
-                # FR-3.3: Realistic coding rate
-                min_coding_time_seconds = commit.min_time_hours * 3600
-
-                # Take the maximum of both constraints
-                min_gap_seconds = max(min_distance_seconds, min_coding_time_seconds)
-                min_gap = timedelta(seconds=min_gap_seconds)
-
-                # Add the gap to current time
-                next_time = current_time + min_gap
-
-                # Check if next_time fits in current window
-                if next_time >= window_end:
-                    # Doesn't fit, move to next window
-                    # Move past the current window end to find the next window
-                    next_window_search = window_end + timedelta(hours=1)
-                    window_start = self.get_next_hobby_start(next_window_search)
-                    window_end = self.get_window_end(window_start)
-                    current_time = window_start
-                else:
-                    current_time = next_time
-            else:
-                # First commit - just use the window start
-                current_time = window_start
-
-            # Set both author and committer date to the same value
-            adjusted.append((commit, current_time, current_time))
-
-        return adjusted
+            return array('q')
+
+        # Minimum gap before each commit, computed up front in one pass over
+        # plain Unix timestamps; only the window walk is sequential
+        orig_ts = commits.author_ts
+        gaps_us = array('q', [0])
+        gaps_us.extend(
+            # FR-3.1 (temporal distance preservation, 50% minimum) vs.
+            # FR-3.3 (realistic coding rate): take the maximum of both
+            timedelta(seconds=max(
+                (orig_ts[i] - orig_ts[i - 1]) * self.distance_factor,
+                coding_time_hours(commits.lines_added[i] + commits.lines_deleted[i]) * 3600
+            )) // ONE_MICROSECOND
+            for i in range(1, len(commits))
+        )
+
+        # Start from the first hobby window after the first commit, in its
+        # local time
+        new_us = array('q', [0]) * len(commits)
+        _walk_hobby_windows(commits.author_ts[0] + commits.author_tz[0], gaps_us,
+                            self._start_s, self._end_s, new_us)
+
+        return new_us
 
     def validate_adjustments(
         self,
-        original_commits: List[Commit],
-        adjusted: List[Tuple[Commit, datetime, datetime]]
+        original_commits: CommitTable,
+        new_us: array
     ) -> bool:
-        """Validate that all constraints are satisfied."""
+        """
+        Validate that all constraints are satisfied.
+
+        Stops at the first failing commit unless verbose_validate is set.
+        """
         errors = []
 
-        for i, (commit, new_author_date, new_committer_date) in enumerate(adjusted):
+        # Checked straight on the table's columns; dates are only built for
+        # error messages. Order and distances compare absolute times: the
+        # new local times are all in the first commit's timezone
+        orig_ts = original_commits.author_ts
+        hashes = original_commits.hashes
+        new_offset_us = original_commits.author_tz[0] * 1000000
+        prev_new_us = 0
+
+        for i in range(len(new_us)):
             # Check hobby window constraint
-            if not self.is_in_hobby_window(new_author_date):
+            if not _in_hobby_window(new_us[i] // 1000000, self._start_s, self._end_s):
                 errors.append(
-                    f"Commit {commit.hash[:7]} timestamp {new_author_date} "
+                    f"Commit {hashes[i][:7]} timestamp {self.from_microseconds(new_us[i])} "
                     f"is outside hobby hours"
                 )
 
             # Check chronological order
+            abs_new_us = new_us[i] - new_offset_us
             if i > 0:
-                prev_new_date = adjusted[i-1][1]
-                if new_author_date <= prev_new_date:
+                new_distance = (abs_new_us - prev_new_us) / 1000000
+                if new_distance <= 0:
                     errors.append(
-                        f"Commit {commit.hash[:7]} breaks chronological order"
+                        f"Commit {hashes[i][:7]} breaks chronological order"
                     )
 
                 # Check temporal distance preservation
-                original_distance = (
-                    original_commits[i].author_date -
-                    original_commits[i-1].author_date
-                ).total_seconds()
-                new_distance = (new_author_date - prev_new_date).total_seconds()
+                original_distance = orig_ts[i] - orig_ts[i-1]
                 min_required = original_distance * self.distance_factor
 
                 if new_distance < min_required - 1:  # -1 for floating point tolerance
                     errors.append(
-                        f"Commit {commit.hash[:7]} temporal distance too small: "
+                        f"Commit {hashes[i][:7]} temporal distance too small: "
                         f"{new_distance:.0f}s < {min_required:.0f}s required"
                     )
 
                 # Check coding rate
-                min_coding_seconds = commit.min_time_hours * 3600
+                lines_changed = original_commits.lines_added[i] + original_commits.lines_deleted[i]
+                min_coding_seconds = coding_time_hours(lines_changed) * 3600
                 if new_distance < min_coding_seconds - 1:
                     errors.append(
-                        f"Commit {commit.hash[:7]} coding rate too fast: "
-                        f"{new_distance:.0f}s for {commit.total_lines_changed} lines"
+                        f"Commit {hashes[i][:7]} coding rate too fast: "
+                        f"{new_distance:.0f}s for {lines_changed} lines"
                     )
+            prev_new_us = abs_new_us
+
+            if errors and not self.verbose_validate:
+                errors.append("(stopped at the first failing commit; "
+                              "use --verbose-validate for a full report)")
+                break
 
         if errors:
             print("\nVALIDATION ERRORS:", file=sys.stderr)
@@ -389,8 +648,8 @@ class GitTimestampAdjuster:
 
     def print_summary(
         self,
-        commits: List[Commit],
-        adjusted: List[Tuple[Commit, datetime, datetime]]
+        commits: CommitTable,
+        new_us: array
     ):
         """Print a summary of the proposed changes."""
         print("\nGit History Timestamp Adjustment", end="")
@@ -412,16 +671,16 @@ class GitTimestampAdjuster:
         print(f"\nAnalysis:")
         print(f"  Total commits: {len(commits)}")
 
-        merge_count = sum(1 for c in commits if c.parent_count > 1)
+        merge_count = sum(1 for n in commits.parent_counts if n > 1)
         print(f"  Merge commits: {merge_count} ✓")
 
         if commits:
             orig_start = commits[0].author_date
             orig_end = commits[-1].author_date
-            orig_span = (orig_end - orig_start).days
+            orig_span = (commits.author_ts[-1] - commits.author_ts[0]) // SECONDS_PER_DAY
 
-            new_start = adjusted[0][1]
-            new_end = adjusted[-1][1]
+            new_start = self.from_microseconds(new_us[0])
+            new_end = self.from_microseconds(new_us[-1])
             new_span_days = (new_end - new_start).days
 
             print(f"  Original span: {orig_start.strftime('%Y-%m-%d %H:%M')} to "
@@ -431,13 +690,13 @@ class GitTimestampAdjuster:
 
         # Show sample changes (first 5)
         print(f"\nSample changes:")
-        for i, (commit, new_author, new_committer) in enumerate(adjusted[:5]):
-            # Convert to naive for comparison if needed
+        for i in range(min(5, len(commits))):
+            commit = commits[i]
+            new_author = self.from_microseconds(new_us[i])
             orig_date = commit.author_date
-            if orig_date.tzinfo is not None:
-                orig_date = orig_date.replace(tzinfo=None)
-
-            time_diff = new_author - orig_date
+            # In absolute time, since the commit may be in another timezone
+            new_ts = new_us[i] // 1000000 - commits.author_tz[0]
+            time_diff = timedelta(seconds=new_ts - commits.author_ts[i])
             hours = int(time_diff.total_seconds() / 3600)
             minutes = int((time_diff.total_seconds() % 3600) / 60)
             sign = "+" if time_diff.total_seconds() > 0 else ""
@@ -447,8 +706,8 @@ class GitTimestampAdjuster:
                   f"{new_author.strftime('%Y-%m-%d %H:%M')} "
                   f"({commit.total_lines_changed} lines, {sign}{hours}h{minutes:02d}m)")
 
-        if len(adjusted) > 5:
-            print(f"  ... and {len(adjusted) - 5} more commits")
+        if len(commits) > 5:
+            print(f"  ... and {len(commits) - 5} more commits")
 
         # Validation
         print(f"\nConstraints satisfied:")
@@ -463,51 +722,105 @@ class GitTimestampAdjuster:
         else:
             print(f"\nWill rewrite {len(commits)} commits across {new_span_days} nights.")
 
-    def apply_changes(self, adjusted: List[Tuple[Commit, datetime, datetime]]):
-        """Apply the timestamp changes to the git repository."""
-        if self.dry_run:
-            return
+    def write_timestamp_map(self, commits: CommitTable, new_us: array) -> str:
+        """
+        Write the new dates to a temporary file and return its path.
 
-        print(f"\nCreating backup branch '{self.backup_branch}'...")
-        self.run_git_command(['git', 'branch', self.backup_branch, self.branch])
+        One line per commit: <hash> <author_timestamp> <committer_timestamp> <tz>
+        """
+        with tempfile.NamedTemporaryFile('w', prefix='adjuster-map-', suffix='.txt',
+                                         delete=False) as f:
+            # New dates are local times in the first commit's timezone, which
+            # every commit gets; author and committer date are the same
+            offset = commits.author_tz[0]
+            tz = format_tz_offset(offset)
+            for i in range(len(commits)):
+                ts = new_us[i] // 1000000 - offset
+                f.write(f"{commits.hashes[i]} {ts} {ts} {tz}\n")
+            return f.name
+
+    def rewrite_with_filter_repo(self, map_path: str):
+        """Rewrite the branch with git filter-repo, looking dates up by hash."""
+        # Loaded once into the callback's globals, then a dict lookup per commit
+        callback = (
+            "global _dates\n"
+            "if '_dates' not in globals():\n"
+            "    _dates = {}\n"
+            f"    with open({map_path!r}, 'rb') as f:\n"
+            "        for line in f:\n"
+            "            h, a, c, tz = line.split()\n"
+            "            _dates[h] = (a + b' ' + tz, c + b' ' + tz)\n"
+            "if commit.original_id in _dates:\n"
+            "    commit.author_date, commit.committer_date = _dates[commit.original_id]\n"
+        )
+        if self.new_email:
+            email = self.new_email.encode()
+            callback += (
+                f"    commit.author_email = {email!r}\n"
+                f"    commit.committer_email = {email!r}\n"
+            )
 
-        print(f"Rewriting history on branch '{self.branch}'...")
+        # Hashes quoted in commit messages (e.g. "Revert abc1234") are left as is
+        self.run_git_command([
+            'git', 'filter-repo',
+            '--force',
+            '--preserve-commit-hashes',
+            '--refs', self.branch,
+            '--commit-callback', callback
+        ])
+
+    def rewrite_with_filter_branch(self, map_path: str):
+        """Rewrite the branch with git filter-branch, looking dates up by hash."""
+        # Keep the env filter constant-size: each commit greps its own line out
+        # of the map file instead of the shell re-parsing a case arm per commit
+        filter_script = (
+            f"set -- $(awk -v k=\"$GIT_COMMIT\" '$1 == k {{ print $2, $3, $4; exit }}' "
+            f"{shlex.quote(map_path)})\n"
+            "if [ $# -eq 3 ]; then\n"
+            "    export GIT_AUTHOR_DATE=\"$1 $3\"\n"
+            "    export GIT_COMMITTER_DATE=\"$2 $3\"\n"
+        )
+
+        # Change email if specified
+        if self.new_email:
+            filter_script += f"    export GIT_AUTHOR_EMAIL='{self.new_email}'\n"
+            filter_script += f"    export GIT_COMMITTER_EMAIL='{self.new_email}'\n"
 
-        # Use git filter-branch to rewrite commits
-        # Build the env filter script
-        filter_script = "case $GIT_COMMIT in\n"
+        filter_script += "fi"
 
-        for commit, new_author, new_committer in adjusted:
-            # Format dates as git expects (Unix timestamp + timezone)
-            author_timestamp = int(new_author.timestamp())
-            committer_timestamp = int(new_committer.timestamp())
+        # Every commit down to the root is adjusted, so the whole branch is
+        # rewritten; skip the deprecation warning and the pause git adds after it
+        self.run_git_command([
+            'git', 'filter-branch',
+            '--force',
+            '--env-filter', filter_script,
+            '--', self.branch
+        ], env={**os.environ, 'FILTER_BRANCH_SQUELCH_WARNING': '1'})
 
-            # Use local timezone
-            tz_offset = new_author.strftime('%z')
-            if not tz_offset:
-                tz_offset = '+0000'
+    def apply_changes(self, commits: CommitTable, new_us: array):
+        """Apply the timestamp changes to the git repository."""
+        if self.dry_run:
+            return
 
-            filter_script += f"    {commit.hash})\n"
-            filter_script += f"        export GIT_AUTHOR_DATE='{author_timestamp} {tz_offset}'\n"
-            filter_script += f"        export GIT_COMMITTER_DATE='{committer_timestamp} {tz_offset}'\n"
+        # Re-check right before rewriting, in case files changed meanwhile
+        if self.has_uncommitted_changes():
+            self.abort_uncommitted_changes()
 
-            # Change email if specified
-            if self.new_email:
-                filter_script += f"        export GIT_AUTHOR_EMAIL='{self.new_email}'\n"
-                filter_script += f"        export GIT_COMMITTER_EMAIL='{self.new_email}'\n"
+        print(f"\nCreating backup branch '{self.backup_branch}'...")
+        self.run_git_command(['git', 'branch', self.backup_branch, self.branch])
 
-            filter_script += f"        ;;\n"
+        print(f"Rewriting history on branch '{self.branch}'...")
 
-        filter_script += "esac"
+        # The date table goes to a file rather than the command line, which
+        # would overflow the argument size limit on long histories
+        map_path = self.write_timestamp_map(commits, new_us)
 
-        # Run filter-branch
+        # Prefer git filter-repo (much faster); fall back to git filter-branch
         try:
-            self.run_git_command([
-                'git', 'filter-branch',
-                '--force',
-                '--env-filter', filter_script,
-                '--', self.branch
-            ])
+            if shutil.which('git-filter-repo'):
+                self.rewrite_with_filter_repo(map_path)
+            else:
+                self.rewrite_with_filter_branch(map_path)
 
             print(f"\n✓ History rewritten successfully!")
             print(f"  Original branch backed up as '{self.backup_branch}'")
@@ -520,11 +833,18 @@ class GitTimestampAdjuster:
             print(f"Your original branch is safe at '{self.backup_branch}'", file=sys.stderr)
             sys.exit(1)
 
+        finally:
+            os.unlink(map_path)
+
     def run(self):
         """Main execution flow."""
         print("Checking repository state...")
         self.check_repository_state()
 
+        # Opportunistically refresh the commit-graph so this and later runs
+        # walk history faster; failure (e.g. old git) is harmless
+        self.run_git_command(['git', 'commit-graph', 'write', '--reachable'], check=False)
+
         print(f"Loading commits from branch '{self.branch}'...")
         commits = self.get_commits()
 
@@ -538,14 +858,14 @@ class GitTimestampAdjuster:
         self.check_for_merges(commits)
 
         print("Calculating new timestamps...")
-        adjusted = self.calculate_new_timestamps(commits)
+        new_us = self.calculate_new_timestamps(commits)
 
         print("Validating adjustments...")
-        if not self.validate_adjustments(commits, adjusted):
+        if not self.validate_adjustments(commits, new_us):
             print("\nValidation failed. Aborting.", file=sys.stderr)
             sys.exit(1)
 
-        self.print_summary(commits, adjusted)
+        self.print_summary(commits, new_us)
 
         if not self.dry_run:
             print("\n" + "="*60)
@@ -554,7 +874,7 @@ class GitTimestampAdjuster:
                 print("Aborted.")
                 sys.exit(0)
 
-            self.apply_changes(adjusted)
+            self.apply_changes(commits, new_us)
 
 
 def main():
@@ -616,6 +936,11 @@ Examples:
         '--new-email',
         help='Replace author and committer email with this address'
     )
+    parser.add_argument(
+        '--verbose-validate',
+        action='store_true',
+        help='Report every validation error instead of stopping at the first'
+    )
 
     args = parser.parse_args()
 
@@ -645,7 +970,8 @@ Examples:
         distance_factor=args.distance_factor,
         dry_run=args.dry_run,
         backup_branch=args.backup_branch,
-        new_email=args.new_email
+        new_email=args.new_email,
+        verbose_validate=args.verbose_validate
     )
 
     adjuster.run()